@@ -13,13 +13,115 @@ Example:
     python add_location_names.py /path/to/memories
 """
 
+import asyncio
 import json
 import os
+import re
 import sys
-import time
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import requests
+import httpx
+
+try:
+    # httpx only negotiates HTTP/2 when the optional h2 package is present
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+try:
+    # orjson parses and serializes JSON several times faster than stdlib
+    import orjson
+
+    def _loads(blob):
+        return orjson.loads(blob)
+
+    def _dumps(data):
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+
+except ImportError:
+    def _loads(blob):
+        return json.loads(blob)
+
+    def _dumps(data):
+        return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+# Matches the coordinate pair in strings like "Latitude, Longitude: 37.54, -77.44"
+_COORD_RE = re.compile(
+    r"Latitude,\s*Longitude:\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)"
+)
+
+# Address keys checked in priority order when building a location name
+_POI_KEYS = ("amenity", "shop", "leisure", "tourism")
+_ROAD_KEYS = ("road", "pedestrian", "path")
+_AREA_KEYS = ("neighbourhood", "suburb", "quarter", "borough", "hamlet")
+_CITY_KEYS = ("city", "town", "village", "municipality")
+
+# US state abbreviations for compact location names
+_STATE_ABBREV = {
+    "Alabama": "AL", "Alaska": "AK", "Arizona": "AZ", "Arkansas": "AR",
+    "California": "CA", "Colorado": "CO", "Connecticut": "CT",
+    "Delaware": "DE", "Florida": "FL", "Georgia": "GA", "Hawaii": "HI",
+    "Idaho": "ID", "Illinois": "IL", "Indiana": "IN", "Iowa": "IA",
+    "Kansas": "KS", "Kentucky": "KY", "Louisiana": "LA", "Maine": "ME",
+    "Maryland": "MD", "Massachusetts": "MA", "Michigan": "MI",
+    "Minnesota": "MN", "Mississippi": "MS", "Missouri": "MO",
+    "Montana": "MT", "Nebraska": "NE", "Nevada": "NV",
+    "New Hampshire": "NH", "New Jersey": "NJ", "New Mexico": "NM",
+    "New York": "NY", "North Carolina": "NC", "North Dakota": "ND",
+    "Ohio": "OH", "Oklahoma": "OK", "Oregon": "OR", "Pennsylvania": "PA",
+    "Rhode Island": "RI", "South Carolina": "SC", "South Dakota": "SD",
+    "Tennessee": "TN", "Texas": "TX", "Utah": "UT", "Vermont": "VT",
+    "Virginia": "VA", "Washington": "WA", "West Virginia": "WV",
+    "Wisconsin": "WI", "Wyoming": "WY",
+    "District of Columbia": "DC",
+}
+
+
+def _build_address_extractor():
+    """
+    Generate the address-tier extractor at import time. The tier keys are
+    fixed, so each tier can be one fused chain of address.get() calls
+    instead of a per-call loop over its key tuple.
+    """
+    def chain(keys):
+        return " or ".join(f"address.get({key!r})" for key in keys)
+
+    src = (
+        "def _extract(address):\n"
+        f"    return ({chain(_POI_KEYS)},\n"
+        f"            {chain(_ROAD_KEYS)},\n"
+        f"            {chain(_AREA_KEYS)},\n"
+        f"            {chain(_CITY_KEYS)})\n"
+    )
+    namespace = {}
+    exec(compile(src, "<generated>", "exec"), namespace)
+    return namespace["_extract"]
+
+
+_extract_address_tiers = _build_address_extractor()
+
+
+class RateLimiter:
+    """
+    Serialize geocoding requests so Nominatim's 1 request/second policy is
+    respected even when many tasks are in flight. Raise the concurrency or
+    lower the delay when pointing at a self-hosted Nominatim instance.
+    """
+
+    def __init__(self, delay=1.0, concurrency=1):
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._delay = delay
+
+    async def wait(self):
+        """Block until this task is allowed to issue its request"""
+        await self._semaphore.acquire()
+        try:
+            await asyncio.sleep(self._delay)
+        finally:
+            self._semaphore.release()
 
 
 def extract_coordinates(location_string):
@@ -32,26 +134,25 @@ def extract_coordinates(location_string):
     Returns:
         tuple: (lat, lon) or None if not found
     """
-    if not location_string or "Latitude, Longitude:" not in location_string:
+    if not location_string:
         return None
-    
-    try:
-        # Extract coordinates from string
-        coords = location_string.split("Latitude, Longitude:")[1].strip()
-        lat, lon = coords.split(",")
-        return float(lat.strip()), float(lon.strip())
-    except (ValueError, IndexError):
+
+    match = _COORD_RE.search(location_string)
+    if not match:
         return None
 
+    return float(match.group(1)), float(match.group(2))
 
-def reverse_geocode(lat, lon):
+
+async def reverse_geocode(session, lat, lon):
     """
     Get place name from coordinates using Nominatim API with precise location details.
-    
+
     Args:
+        session (httpx.AsyncClient): Shared HTTP client
         lat (float): Latitude
         lon (float): Longitude
-    
+
     Returns:
         str: Place name or None if geocoding fails
     """
@@ -66,15 +167,12 @@ def reverse_geocode(lat, lon):
             "extratags": 1,  # Get extra tags like amenity types
             "namedetails": 1  # Get name variants
         }
-        headers = {
-            "User-Agent": "SnapchatMemoriesLocationAdder/1.0"
-        }
-        
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        
+
+        response = await session.get(url, params=params)
+
         if response.status_code == 200:
             data = response.json()
-            
+
             if "address" in data:
                 address = data["address"]
                 display_name = data.get("display_name", "")
@@ -87,21 +185,15 @@ def reverse_geocode(lat, lon):
                 # Build precise location name with hierarchical approach
                 location_parts = []
                 
-                # TIER 1: Most specific - POI, Building, or Venue
-                specific_place = None
-                
-                # Check for specific POI/amenity names
-                if "amenity" in address:
-                    specific_place = address["amenity"]
-                elif "shop" in address:
-                    specific_place = address["shop"]
-                elif "leisure" in address:
-                    specific_place = address["leisure"]
-                elif "tourism" in address:
-                    specific_place = address["tourism"]
-                elif "building" in address and address["building"] not in ["yes", "residential"]:
-                    specific_place = address["building"]
-                
+                # TIERS 1-4 in one generated call: POI/venue, street, area,
+                # and city (see _build_address_extractor)
+                specific_place, road, area, city = _extract_address_tiers(address)
+
+                if not specific_place:
+                    building = address.get("building")
+                    if building and building not in ("yes", "residential"):
+                        specific_place = building
+
                 # Use the actual name if available (like "Starbucks", "Central Park")
                 if "name" in data and data["name"]:
                     location_parts.append(data["name"])
@@ -109,40 +201,7 @@ def reverse_geocode(lat, lon):
                     # Capitalize and format the amenity type
                     formatted = specific_place.replace("_", " ").title()
                     location_parts.append(formatted)
-                
-                # TIER 2: Street/Road level for more context
-                road = None
-                if "road" in address:
-                    road = address["road"]
-                elif "pedestrian" in address:
-                    road = address["pedestrian"]
-                elif "path" in address:
-                    road = address["path"]
-                
-                # TIER 3: Neighborhood/Area
-                area = None
-                if "neighbourhood" in address:
-                    area = address["neighbourhood"]
-                elif "suburb" in address:
-                    area = address["suburb"]
-                elif "quarter" in address:
-                    area = address["quarter"]
-                elif "borough" in address:
-                    area = address["borough"]
-                elif "hamlet" in address:
-                    area = address["hamlet"]
-                
-                # TIER 4: City/Municipality
-                city = None
-                if "city" in address:
-                    city = address["city"]
-                elif "town" in address:
-                    city = address["town"]
-                elif "village" in address:
-                    city = address["village"]
-                elif "municipality" in address:
-                    city = address["municipality"]
-                
+
                 # TIER 5: State/Region
                 state = address.get("state")
                 
@@ -171,14 +230,7 @@ def reverse_geocode(lat, lon):
                 # Add state for US locations or major region for others
                 if state and country_code == "US":
                     # For US, use state abbreviation if possible
-                    state_abbrev = {
-                        "California": "CA", "Texas": "TX", "Florida": "FL",
-                        "New York": "NY", "Virginia": "VA", "North Carolina": "NC",
-                        "Georgia": "GA", "Illinois": "IL", "Pennsylvania": "PA",
-                        "Ohio": "OH", "Michigan": "MI", "Washington": "WA"
-                        # Add more as needed
-                    }.get(state, state)
-                    location_parts.append(state_abbrev)
+                    location_parts.append(_STATE_ABBREV.get(state, state))
                 elif state and country_code != "US":
                     location_parts.append(state)
                 
@@ -196,6 +248,77 @@ def reverse_geocode(lat, lon):
         return None
 
 
+def geocode_unique_locations(unique_coords):
+    """
+    Geocode each unique coordinate exactly once, rate limited to 1 request
+    per second but with all requests sharing one HTTP session.
+
+    Args:
+        unique_coords (dict): Mapping of coord_key -> (lat, lon)
+
+    Returns:
+        dict: Mapping of coord_key -> location name
+    """
+    results = {}
+
+    async def geocode_one(session, limiter, coord_key, lat, lon):
+        await limiter.wait()
+        location_name = await reverse_geocode(session, lat, lon)
+        label = f"{lat:.2f},{lon:.2f}"
+
+        if location_name:
+            print(f"✓ {label}: {location_name}")
+        else:
+            # Fallback to formatted coordinates
+            lat_dir = "N" if lat >= 0 else "S"
+            lon_dir = "E" if lon >= 0 else "W"
+            location_name = f"{abs(lat):.2f}°{lat_dir}, {abs(lon):.2f}°{lon_dir}"
+            print(f"⚠️  {label}: {location_name} (geocoding failed)")
+
+        results[coord_key] = location_name
+
+    async def geocode_all():
+        headers = {"User-Agent": "SnapchatMemoriesLocationAdder/1.0"}
+        limiter = RateLimiter(delay=1.0)
+
+        # Keep the HTTPS connection to Nominatim alive between requests so
+        # only the first one pays the TCP+TLS handshake cost; with h2
+        # installed, requests multiplex over a single HTTP/2 connection
+        limits = httpx.Limits(max_connections=4, max_keepalive_connections=4)
+
+        async with httpx.AsyncClient(
+            http2=_HTTP2, headers=headers, timeout=10.0, limits=limits
+        ) as session:
+            tasks = [
+                geocode_one(session, limiter, coord_key, lat, lon)
+                for coord_key, (lat, lon) in unique_coords.items()
+            ]
+            await asyncio.gather(*tasks)
+
+    asyncio.run(geocode_all())
+    return results
+
+
+def _load_json(json_file):
+    """Read one JSON file, returning (path, data) or (path, None) on error"""
+    try:
+        return json_file, _loads(json_file.read_bytes())
+    except Exception as e:
+        print(f"❌ Error reading {json_file.name}: {e}")
+        return json_file, None
+
+
+def _write_json(item):
+    """Write one (path, data) pair back to disk, returning False on error"""
+    json_file, data = item
+    try:
+        json_file.write_bytes(_dumps(data))
+        return True
+    except Exception as e:
+        print(f"❌ Error writing {json_file.name}: {e}")
+        return False
+
+
 def process_memories_folder(folder_path, force=False):
     """
     Process all JSON files in the memories folder and add location names.
@@ -210,8 +333,11 @@ def process_memories_folder(folder_path, force=False):
         print(f"❌ Error: '{folder_path}' is not a valid directory")
         return
     
-    # Find all JSON files
-    json_files = list(folder.rglob("*.json"))
+    # Find all JSON files, ignoring the downloader's .metacache dedup
+    # directories (their entries are hardlinked copies of real sidecars)
+    json_files = [
+        p for p in folder.rglob("*.json") if '.metacache' not in p.parts
+    ]
     
     if not json_files:
         print(f"❌ No JSON files found in '{folder_path}'")
@@ -223,66 +349,70 @@ def process_memories_folder(folder_path, force=False):
     processed = 0
     skipped = 0
     errors = 0
-    
-    # Track unique locations to avoid repeated geocoding
-    location_cache = {}
-    
-    for json_file in json_files:
-        try:
-            # Read JSON file
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Check if already has location name (skip unless force mode)
-            if "Location Name" in data and not force:
-                print(f"⏭️  Skipping {json_file.name} (already has location name)")
-                skipped += 1
-                continue
-            
-            # Extract coordinates
-            location_str = data.get("Location", "")
-            coords = extract_coordinates(location_str)
-            
-            if not coords:
-                print(f"⏭️  Skipping {json_file.name} (no coordinates)")
-                data["Location Name"] = "Unknown location"
-                skipped += 1
-            else:
-                lat, lon = coords
-                coord_key = f"{round(lat, 2)},{round(lon, 2)}"
-                
-                # Check cache first
-                if coord_key in location_cache:
-                    location_name = location_cache[coord_key]
-                    print(f"✓ {json_file.name}: {location_name} (cached)")
-                else:
-                    # Geocode with rate limiting (1 request per second)
-                    time.sleep(1)
-                    
-                    location_name = reverse_geocode(lat, lon)
-                    
-                    if location_name:
-                        location_cache[coord_key] = location_name
-                        print(f"✓ {json_file.name}: {location_name}")
-                    else:
-                        # Fallback to formatted coordinates
-                        lat_dir = "N" if lat >= 0 else "S"
-                        lon_dir = "E" if lon >= 0 else "W"
-                        location_name = f"{abs(lat):.2f}°{lat_dir}, {abs(lon):.2f}°{lon_dir}"
-                        location_cache[coord_key] = location_name
-                        print(f"⚠️  {json_file.name}: {location_name} (geocoding failed)")
-                
-                data["Location Name"] = location_name
-                processed += 1
-            
-            # Write updated JSON back to file
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        
-        except Exception as e:
-            print(f"❌ Error processing {json_file.name}: {e}")
+
+    # Pass 1: collect the unique coordinates that still need geocoding,
+    # grouped so each location is only ever requested once. The parsed data
+    # is kept alongside each path so pass 3 never re-reads a file.
+    unique_coords = {}  # coord_key -> (lat, lon)
+    coord_files = {}    # coord_key -> [(json_file, data), ...]
+    pending_writes = []  # (json_file, data) pairs that need writing back
+
+    # File reads are I/O-bound, so let the thread pool keep several in flight
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        loaded = list(pool.map(_load_json, json_files))
+
+    for json_file, data in loaded:
+        if data is None:
             errors += 1
-    
+            continue
+
+        # Check if already has location name (skip unless force mode)
+        if "Location Name" in data and not force:
+            print(f"⏭️  Skipping {json_file.name} (already has location name)")
+            skipped += 1
+            continue
+
+        # Extract coordinates
+        location_str = data.get("Location", "")
+        coords = extract_coordinates(location_str)
+
+        if not coords:
+            # Nothing to geocode, so don't rewrite the file at all
+            print(f"⏭️  Skipping {json_file.name} (no coordinates)")
+            skipped += 1
+            continue
+
+        lat, lon = coords
+
+        # Two small ints hash faster and take less memory than the old
+        # formatted "lat,lon" string keys (same 0.01-degree granularity)
+        coord_key = (round(lat * 100), round(lon * 100))
+
+        unique_coords.setdefault(coord_key, (lat, lon))
+        coord_files.setdefault(coord_key, []).append((json_file, data))
+
+    # Pass 2: geocode each unique coordinate concurrently (rate limited)
+    location_cache = geocode_unique_locations(unique_coords) if unique_coords else {}
+
+    # Pass 3: write the resolved names back to every file
+    for coord_key, files in coord_files.items():
+        location_name = location_cache.get(coord_key)
+
+        for json_file, data in files:
+            processed += 1
+
+            # Don't touch the file (or its mtime) when nothing would change
+            if data.get("Location Name") == location_name:
+                continue
+
+            data["Location Name"] = location_name
+            pending_writes.append((json_file, data))
+
+    if pending_writes:
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(_write_json, pending_writes))
+        errors += results.count(False)
+
     # Summary
     print(f"\n{'='*50}")
     print(f"Processing complete!")
@@ -5,121 +5,389 @@ Takes media files with associated PNG overlays and composites them together,
 replacing the original media file with the overlaid version.
 """
 
+import hashlib
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 from PIL import Image
 import subprocess
 import json
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+
+if np is not None and njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _composite_rgba(main, overlay, out, flatten):
+        """
+        Alpha-composite overlay onto main in a single pass over both buffers.
+        With flatten=True the result is also blended over a white background
+        (for JPG output) instead of needing a separate PIL paste pass.
+        """
+        height, width = main.shape[0], main.shape[1]
+        for y in prange(height):
+            for x in range(width):
+                oa = overlay[y, x, 3] / 255.0
+                ma = main[y, x, 3] / 255.0
+                alpha = oa + ma * (1.0 - oa)
+                if flatten:
+                    for c in range(3):
+                        value = overlay[y, x, c] * oa + main[y, x, c] * ma * (1.0 - oa)
+                        value += 255.0 * (1.0 - alpha)
+                        out[y, x, c] = np.uint8(min(255.0, value))
+                    out[y, x, 3] = 255
+                else:
+                    if alpha > 0.0:
+                        for c in range(3):
+                            value = overlay[y, x, c] * oa + main[y, x, c] * ma * (1.0 - oa)
+                            out[y, x, c] = np.uint8(min(255.0, value / alpha))
+                    else:
+                        for c in range(3):
+                            out[y, x, c] = 0
+                    out[y, x, 3] = np.uint8(alpha * 255.0)
+
+elif np is not None:
+    def _composite_rgba(main, overlay, out, flatten):
+        """Vectorized numpy fallback when numba isn't installed"""
+        oa = overlay[:, :, 3:].astype(np.float32) / 255.0
+        ma = main[:, :, 3:].astype(np.float32) / 255.0
+        alpha = oa + ma * (1.0 - oa)
+        rgb = overlay[:, :, :3] * oa + main[:, :, :3] * ma * (1.0 - oa)
+        if flatten:
+            rgb += 255.0 * (1.0 - alpha)
+            alpha = np.ones_like(alpha)
+        else:
+            rgb = rgb / np.where(alpha > 0.0, alpha, 1.0)
+        out[:, :, :3] = np.clip(rgb, 0.0, 255.0).astype(np.uint8)
+        out[:, :, 3:] = (alpha * 255.0).astype(np.uint8)
+
+
 def get_media_base_files(memories_dir):
     """
     Get all unique base filenames (without extension).
     Groups files like: 20251212_034909_6_main.mp4, 20251212_034909_6_overlay_1.png
     """
     files = {}
-    
-    for filename in os.listdir(memories_dir):
-        filepath = os.path.join(memories_dir, filename)
-        if not os.path.isfile(filepath):
-            continue
-        
-        # Extract the base name (before _main, _overlay, or final extension)
-        parts = filename.rsplit('.', 1)
-        if len(parts) != 2:
-            continue
-        
-        name, ext = parts
-        
-        # Skip JSON metadata files
-        if ext.lower() == 'json':
-            continue
-        
-        # Get base identifier (e.g., "20251212_034909_6" from "20251212_034909_6_main")
-        if name.endswith('_main'):
-            base_id = name[:-5]  # Remove "_main"
-        elif '_overlay_' in name:
-            base_id = name.split('_overlay_')[0]
-        else:
-            # File without _main or _overlay suffix, treat as standalone
-            base_id = name
-        
-        if base_id not in files:
-            files[base_id] = {'main': None, 'overlays': [], 'json': None}
-        
-        if name.endswith('_main'):
-            files[base_id]['main'] = (filename, ext.lower())
-        elif '_overlay_' in name:
-            files[base_id]['overlays'].append((filename, ext.lower()))
-        else:
-            # Standalone file (no _main or _overlay)
-            files[base_id]['main'] = (filename, ext.lower())
-    
+
+    def scan(dir_path, prefix):
+        # scandir reuses the dirent for the type check, so there's no extra
+        # stat syscall per entry like os.path.isfile incurs
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    # The downloader shards output into per-month (YYYYMM)
+                    # subfolders; descend one level into those
+                    if prefix == '' and entry.name != '.metacache':
+                        scan(entry.path, entry.name + os.sep)
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+
+                # Filenames stay relative to memories_dir so downstream
+                # joins work for sharded and flat layouts alike
+                filename = prefix + entry.name
+
+                # Extract the base name (before _main, _overlay, or final extension)
+                name, dot, ext = filename.rpartition('.')
+                if not dot:
+                    continue
+
+                ext = ext.lower()
+
+                # Skip JSON metadata files
+                if ext == 'json':
+                    continue
+
+                # Classify in a single pass over the name: overlay, _main, or
+                # standalone (standalone files also count as the main media)
+                base_id, sep, _ = name.rpartition('_overlay_')
+                if sep:
+                    is_overlay = True
+                else:
+                    is_overlay = False
+                    base_id = name[:-5] if name.endswith('_main') else name
+
+                if base_id not in files:
+                    files[base_id] = {'main': None, 'overlays': [], 'json': None}
+
+                if is_overlay:
+                    files[base_id]['overlays'].append((filename, ext))
+                else:
+                    files[base_id]['main'] = (filename, ext)
+
+    scan(memories_dir, '')
     return files
 
+# Decoded overlays keyed by (content hash, target size). Snap exports often
+# attach the same caption sticker to many memories, so repeat composites can
+# reuse the decoded and resized overlay instead of re-opening the PNG.
+_OVERLAY_CACHE = {}
+_OVERLAY_CACHE_MAX = 64
+
+def _load_overlay(overlay_path, size):
+    """Load an overlay as RGBA at the given size, caching by content hash"""
+    digest = hashlib.blake2b(
+        Path(overlay_path).read_bytes(), digest_size=16
+    ).digest()
+    key = (digest, size)
+
+    overlay_img = _OVERLAY_CACHE.get(key)
+    if overlay_img is not None:
+        return overlay_img
+
+    overlay_img = Image.open(overlay_path)
+
+    # The overlay always needs an alpha channel for blending
+    if overlay_img.mode != 'RGBA':
+        overlay_img = overlay_img.convert('RGBA')
+
+    # Resize overlay to match main image dimensions if needed
+    if overlay_img.size != size:
+        overlay_img = overlay_img.resize(size, Image.Resampling.LANCZOS)
+
+    if len(_OVERLAY_CACHE) >= _OVERLAY_CACHE_MAX:
+        # Evict the oldest entry to keep memory bounded
+        _OVERLAY_CACHE.pop(next(iter(_OVERLAY_CACHE)))
+    _OVERLAY_CACHE[key] = overlay_img
+
+    return overlay_img
+
 def apply_overlay_to_image(main_path, overlay_path, output_path):
     """Apply a PNG overlay to an image and save the result"""
     try:
         # Open the main image
         main_img = Image.open(main_path)
-        
-        # Open the overlay
-        overlay_img = Image.open(overlay_path)
-        
-        # Ensure both images are in RGBA for proper alpha blending
+
+        # Open the overlay (cached when the same sticker repeats)
+        overlay_img = _load_overlay(overlay_path, main_img.size)
+
+        to_jpg = output_path.lower().endswith('.jpg')
+
+        # Fast path: fused composite (and JPG flatten) in one pass over the
+        # pixel buffers instead of separate composite/paste/split passes
+        if np is not None:
+            if main_img.mode != 'RGBA':
+                main_img = main_img.convert('RGBA')
+            main_arr = np.asarray(main_img, dtype=np.uint8)
+            overlay_arr = np.asarray(overlay_img, dtype=np.uint8)
+            out = np.empty_like(main_arr)
+            _composite_rgba(main_arr, overlay_arr, out, to_jpg)
+
+            if to_jpg:
+                Image.fromarray(out[:, :, :3], 'RGB').save(output_path, quality=95)
+            else:
+                Image.fromarray(out, 'RGBA').save(output_path)
+            return True
+
+        # Opaque mains (typical for JPEG sources): paste with the overlay's
+        # own alpha as the mask, skipping the full-image RGBA round trip
+        if main_img.mode in ('RGB', 'L'):
+            if main_img.mode == 'L':
+                main_img = main_img.convert('RGB')
+            main_img.paste(overlay_img, (0, 0), overlay_img)
+            if to_jpg:
+                main_img.save(output_path, quality=95)
+            else:
+                main_img.save(output_path)
+            return True
+
+        # Transparent mains need a true alpha composite
         if main_img.mode != 'RGBA':
             main_img = main_img.convert('RGBA')
-        
-        if overlay_img.mode != 'RGBA':
-            overlay_img = overlay_img.convert('RGBA')
-        
-        # Resize overlay to match main image dimensions if needed
-        if overlay_img.size != main_img.size:
-            overlay_img = overlay_img.resize(main_img.size, Image.Resampling.LANCZOS)
-        
-        # Composite the overlay onto the main image
-        # The overlay's alpha channel controls transparency
         main_img = Image.alpha_composite(main_img, overlay_img)
-        
-        # Convert back to RGB for JPG output (if needed)
-        if output_path.lower().endswith('.jpg'):
-            # Create a white background for transparency
-            background = Image.new('RGB', main_img.size, (255, 255, 255))
-            background.paste(main_img, mask=main_img.split()[3] if main_img.mode == 'RGBA' else None)
-            background.save(output_path, quality=95)
+
+        if to_jpg:
+            main_img.convert('RGB').save(output_path, quality=95)
         else:
             # Keep RGBA for PNG
             main_img.save(output_path)
-        
+
         return True
     except Exception as e:
         print(f"    Error applying overlay: {e}")
         return False
 
-def apply_overlay_to_video(main_path, overlay_path, output_path, temp_frame_dir="temp_frames"):
+# Cached encoder choice so ffmpeg's encoders are only probed once per run
+_ENCODER_ARGS = None
+
+def _encoder_works(codec):
     """
-    Apply a PNG overlay to a video using ffmpeg.
-    Creates an overlay filter that composites the PNG on top of each video frame.
+    Check that an encoder actually works with a one-frame test encode.
+
+    ffmpeg's -encoders list only shows what was compiled in: stock Linux
+    builds list h264_nvenc even on machines with no NVIDIA GPU, where
+    every real encode would fail.
     """
     try:
-        # Use ffmpeg with overlay filter
-        # Scale overlay to match video dimensions for proper encoding
-        # Use -c:v copy for video codec to preserve original (faster) or libx264 for re-encoding
-        
+        result = subprocess.run(
+            [
+                'ffmpeg', '-hide_banner', '-v', 'error',
+                '-f', 'lavfi', '-i', 'color=c=black:s=128x128:d=0.1',
+                '-frames:v', '1', '-c:v', codec, '-f', 'null', '-'
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=30
+        )
+        return result.returncode == 0
+    except Exception:
+        return False
+
+def _pick_encoder():
+    """
+    Pick the fastest H.264 encoder ffmpeg has available, preferring the
+    platform's hardware encoder (VideoToolbox/NVENC/QSV) over software
+    libx264. Candidates are validated with a test encode, and the result
+    is cached for the whole run.
+    """
+    global _ENCODER_ARGS
+    if _ENCODER_ARGS is not None:
+        return _ENCODER_ARGS
+
+    available = ''
+    try:
+        result = subprocess.run(
+            ['ffmpeg', '-hide_banner', '-encoders'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=30,
+            text=True
+        )
+        if result.returncode == 0:
+            available = result.stdout
+    except Exception:
+        pass
+
+    if (sys.platform == 'darwin' and 'h264_videotoolbox' in available
+            and _encoder_works('h264_videotoolbox')):
+        _ENCODER_ARGS = ['-c:v', 'h264_videotoolbox']
+    elif 'h264_nvenc' in available and _encoder_works('h264_nvenc'):
+        _ENCODER_ARGS = ['-c:v', 'h264_nvenc', '-preset', 'fast']
+    elif 'h264_qsv' in available and _encoder_works('h264_qsv'):
+        _ENCODER_ARGS = ['-c:v', 'h264_qsv', '-preset', 'fast']
+    else:
+        _ENCODER_ARGS = ['-c:v', 'libx264', '-preset', 'ultrafast', '-tune', 'zerolatency']
+
+    return _ENCODER_ARGS
+
+# Probed video dimensions keyed by path so a group never runs ffprobe twice
+_DIMS_CACHE = {}
+
+def _get_dims(main_path):
+    """Return a video's dimensions string via ffprobe, or None on failure"""
+    if main_path in _DIMS_CACHE:
+        return _DIMS_CACHE[main_path]
+
+    dimensions = None
+    try:
+        result = subprocess.run(
+            [
+                'ffprobe',
+                '-v', 'error',
+                '-select_streams', 'v:0',
+                '-show_entries', 'stream=width,height',
+                '-of', 'csv=s=x:p=0',
+                main_path
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=30,
+            text=True
+        )
+        if result.returncode == 0:
+            # ffprobe reports "WxH"; the scale filter wants "W:H"
+            dimensions = result.stdout.strip().replace('x', ':') or None
+    except Exception:
+        pass
+
+    _DIMS_CACHE[main_path] = dimensions
+    return dimensions
+
+def _pick_audio_args(main_path):
+    """Stream-copy the audio track when it's already AAC instead of re-encoding it"""
+    try:
+        result = subprocess.run(
+            [
+                'ffprobe',
+                '-v', 'error',
+                '-select_streams', 'a:0',
+                '-show_entries', 'stream=codec_name',
+                '-of', 'csv=p=0',
+                main_path
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=30,
+            text=True
+        )
+        if result.returncode == 0 and result.stdout.strip() == 'aac':
+            return ['-c:a', 'copy']
+    except Exception:
+        pass
+    return ['-c:a', 'aac', '-b:a', '128k']
+
+def _build_overlay_filter(overlay_count, scale='iw:ih:force_original_aspect_ratio=decrease',
+                          position='(main_w-overlay_w)/2:(main_h-overlay_h)/2'):
+    """
+    Build a -filter_complex chain that stacks every overlay onto the video:
+    [1:v]scale=...[ov1];[0:v][ov1]overlay=...[v1];[2:v]scale=...[ov2];[v1][ov2]overlay=...
+    """
+    parts = []
+    last = '[0:v]'
+    for i in range(1, overlay_count + 1):
+        out_label = f'[v{i}]' if i < overlay_count else ''
+        parts.append(f'[{i}:v]scale={scale}[ov{i}]')
+        parts.append(f'{last}[ov{i}]overlay={position}{out_label}')
+        last = f'[v{i}]'
+    return ';'.join(parts)
+
+def apply_overlays_to_video(main_path, overlay_paths, output_path):
+    """
+    Apply one or more PNG overlays to a video using ffmpeg.
+    All overlays are stacked into a single filter graph so the video is
+    decoded and re-encoded exactly once regardless of overlay count.
+    """
+    try:
+        inputs = ['-i', main_path]
+        for overlay_path in overlay_paths:
+            inputs += ['-i', overlay_path]
+
+        encoder_args = _pick_encoder()
+        audio_args = _pick_audio_args(main_path)
+
+        # Probe the video's dimensions up front and scale every overlay to
+        # match exactly; encoding with the generic filter and retrying on
+        # failure used to cost a second full encode for mismatched overlays
+        dimensions = _get_dims(main_path)
+        if dimensions:
+            filter_graph = _build_overlay_filter(
+                len(overlay_paths), scale=dimensions, position='0:0'
+            )
+        else:
+            filter_graph = _build_overlay_filter(len(overlay_paths))
+
         cmd = [
             'ffmpeg',
-            '-i', main_path,
-            '-i', overlay_path,
+            *inputs,
             '-filter_complex',
-            '[1:v]scale=iw:ih:force_original_aspect_ratio=decrease[overlay];[0:v][overlay]overlay=(main_w-overlay_w)/2:(main_h-overlay_h)/2:enable=\'between(t,0,n)\'',
-            '-c:v', 'libx264',
-            '-preset', 'fast',
-            '-c:a', 'aac',
-            '-b:a', '128k',
+            filter_graph,
+            *encoder_args,
+            *audio_args,
+            '-threads', '2',  # Pool workers each run their own ffmpeg
             '-y',  # Overwrite output file
             output_path
         ]
-        
+
         # Run ffmpeg
         result = subprocess.run(
             cmd,
@@ -127,56 +395,11 @@ def apply_overlay_to_video(main_path, overlay_path, output_path, temp_frame_dir=
             stderr=subprocess.PIPE,
             timeout=300  # 5 minute timeout per video
         )
-        
+
         if result.returncode != 0:
-            # Try alternative approach: scale overlay to match video dimensions exactly
-            print(f"    Retrying with scaled overlay...", end="")
-            
-            # Get video dimensions first
-            probe_cmd = [
-                'ffprobe',
-                '-v', 'error',
-                '-select_streams', 'v:0',
-                '-show_entries', 'stream=width,height',
-                '-of', 'csv=s=x:p=0',
-                main_path
-            ]
-            
-            try:
-                probe_result = subprocess.run(probe_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=30, text=True)
-                if probe_result.returncode == 0:
-                    dimensions = probe_result.stdout.strip()
-                    
-                    cmd = [
-                        'ffmpeg',
-                        '-i', main_path,
-                        '-i', overlay_path,
-                        '-filter_complex',
-                        f'[1:v]scale={dimensions}[overlay];[0:v][overlay]overlay=0:0',
-                        '-c:v', 'libx264',
-                        '-preset', 'fast',
-                        '-c:a', 'aac',
-                        '-b:a', '128k',
-                        '-y',
-                        output_path
-                    ]
-                    
-                    result = subprocess.run(
-                        cmd,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        timeout=300
-                    )
-                    
-                    if result.returncode == 0:
-                        print(" ✓")
-                        return True
-            except Exception as e:
-                pass
-            
             print(f"    FFmpeg error")
             return False
-        
+
         return True
     except subprocess.TimeoutExpired:
         print(f"    Video processing timeout")
@@ -188,6 +411,114 @@ def apply_overlay_to_video(main_path, overlay_path, output_path, temp_frame_dir=
         print(f"    Error applying overlay to video: {e}")
         return False
 
+def _process_group(base_id, file_group, memories_dir):
+    """
+    Apply every overlay for one media group. Runs in a pool worker, so log
+    lines are collected and returned instead of printed to keep the output
+    of concurrent groups from interleaving.
+
+    Returns (processed, skipped, lines).
+    """
+    lines = []
+    processed = 0
+    skipped = 0
+
+    # Plain string paths in the hot path -- every pathlib "/" allocates a
+    # new PurePath object
+    memories_dir_str = str(memories_dir)
+    path_join = os.path.join
+    path_exists = os.path.exists
+
+    main_filename, main_ext = file_group['main']
+    main_path = path_join(memories_dir_str, main_filename)
+
+    lines.append(f"✓ {base_id}")
+    lines.append(f"  Main: {main_filename}")
+
+    # Drop overlays whose file went missing
+    overlays = []  # (filename, full path)
+    for overlay_filename, overlay_ext in file_group['overlays']:
+        overlay_path = path_join(memories_dir_str, overlay_filename)
+        if not path_exists(overlay_path):
+            lines.append(f"    Overlay not found: {overlay_filename}")
+            continue
+        overlays.append((overlay_filename, overlay_path))
+
+    if not overlays:
+        return processed, skipped + 1, lines
+
+    temp_output = path_join(memories_dir_str, f"{base_id}_with_overlay.{main_ext}")
+
+    if main_ext.lower() in ['mp4', 'mov', 'avi']:
+        # Videos: stack every overlay into one ffmpeg pass so the video
+        # is only re-encoded once, however many captions it has
+        names = ', '.join(name for name, _ in overlays)
+
+        success = apply_overlays_to_video(
+            main_path, [p for _, p in overlays], temp_output
+        )
+
+        if success:
+            lines.append(f"  Applying: {names} ✓")
+
+            # Replace original with overlaid version
+            try:
+                os.replace(temp_output, main_path)
+                lines.append(f"    Replaced original with overlaid version")
+
+                # Delete the overlay files since they're now merged
+                for overlay_filename, overlay_path in overlays:
+                    os.remove(overlay_path)
+                    lines.append(f"    Deleted overlay: {overlay_filename}")
+
+                processed += 1
+            except Exception as e:
+                lines.append(f"    Error replacing file: {e}")
+                # Clean up temp file
+                if path_exists(temp_output):
+                    os.remove(temp_output)
+        else:
+            lines.append(f"  Applying: {names} ✗")
+            # Clean up failed temp file
+            if path_exists(temp_output):
+                os.remove(temp_output)
+
+        return processed, skipped, lines
+
+    # Images: apply each overlay in turn
+    for overlay_filename, overlay_path in overlays:
+        if main_ext.lower() not in ['jpg', 'jpeg', 'png']:
+            lines.append(f"  Applying: {overlay_filename} (unsupported format: {main_ext})")
+            continue
+
+        success = apply_overlay_to_image(main_path, overlay_path, temp_output)
+
+        if success:
+            lines.append(f"  Applying: {overlay_filename} ✓")
+
+            # Replace original with overlaid version
+            try:
+                os.replace(temp_output, main_path)
+                lines.append(f"    Replaced original with overlaid version")
+
+                # Delete the overlay file since it's now merged
+                os.remove(overlay_path)
+                lines.append(f"    Deleted overlay: {overlay_filename}")
+
+                processed += 1
+            except Exception as e:
+                lines.append(f"    Error replacing file: {e}")
+                # Clean up temp file
+                if path_exists(temp_output):
+                    os.remove(temp_output)
+        else:
+            lines.append(f"  Applying: {overlay_filename} ✗")
+            # Clean up failed temp file
+            if path_exists(temp_output):
+                os.remove(temp_output)
+
+    return processed, skipped, lines
+
 def process_memories(memories_dir):
     """Process all memories with overlays"""
     memories_dir = Path(memories_dir)
@@ -210,73 +541,38 @@ def process_memories(memories_dir):
     print(f"Found {total} unique media file(s)")
     print("-" * 60)
     
+    # Filter out the groups with nothing to do, then fan the real work out
+    # across a process pool (PIL composites and ffmpeg encodes don't fully
+    # use the machine one at a time)
+    work_items = []
     for base_id, file_group in media_files.items():
         # Skip if no main media file
         if not file_group['main']:
             print(f"⊘ {base_id}: No main media file found")
             skipped_count += 1
             continue
-        
+
         # Skip if no overlays
         if not file_group['overlays']:
             print(f"○ {base_id}: No overlays (skipped)")
             skipped_count += 1
             continue
-        
-        main_filename, main_ext = file_group['main']
-        main_path = memories_dir / main_filename
-        
-        print(f"✓ {base_id}")
-        print(f"  Main: {main_filename}")
-        
-        # Process each overlay
-        for overlay_filename, overlay_ext in file_group['overlays']:
-            overlay_path = memories_dir / overlay_filename
-            
-            if not overlay_path.exists():
-                print(f"    Overlay not found: {overlay_filename}")
-                continue
-            
-            print(f"  Applying: {overlay_filename}", end="")
-            
-            # Create temporary output path
-            temp_output = memories_dir / f"{base_id}_with_overlay.{main_ext}"
-            
-            # Apply overlay based on media type
-            if main_ext.lower() in ['jpg', 'jpeg', 'png']:
-                success = apply_overlay_to_image(str(main_path), str(overlay_path), str(temp_output))
-            elif main_ext.lower() in ['mp4', 'mov', 'avi']:
-                success = apply_overlay_to_video(str(main_path), str(overlay_path), str(temp_output))
-            else:
-                print(f" (unsupported format: {main_ext})")
-                continue
-            
-            if success:
-                print(" ✓")
-                
-                # Replace original with overlaid version
-                try:
-                    os.replace(str(temp_output), str(main_path))
-                    print(f"    Replaced original with overlaid version")
-                    
-                    # Delete the overlay file since it's now merged
-                    overlay_path.unlink()
-                    print(f"    Deleted overlay: {overlay_filename}")
-                    
-                    processed_count += 1
-                except Exception as e:
-                    print(f"    Error replacing file: {e}")
-                    # Clean up temp file
-                    if temp_output.exists():
-                        temp_output.unlink()
-            else:
-                print(" ✗")
-                # Clean up failed temp file
-                if temp_output.exists():
-                    temp_output.unlink()
-        
-        print()
-    
+
+        work_items.append((base_id, file_group))
+
+    if work_items:
+        max_workers = max(1, (os.cpu_count() or 2) // 2)
+        worker = partial(_process_group, memories_dir=memories_dir)
+
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            for processed, skipped, lines in pool.map(
+                worker, (b for b, _ in work_items), (g for _, g in work_items)
+            ):
+                print("\n".join(lines))
+                print()
+                processed_count += processed
+                skipped_count += skipped
+
     # Summary
     print("-" * 60)
     print(f"Processing complete!")